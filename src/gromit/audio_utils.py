@@ -1,37 +1,38 @@
 import os
+import shutil
+import subprocess
 import tempfile
-from pathlib import Path
 from typing import Optional, Tuple
 
 import soundfile as sf
+import torch
+import torchaudio
 from pydub import AudioSegment
 
+# Sample rate expected by both pyannote and whisper
+SAMPLE_RATE = 16000
 
-def is_supported_by_soundfile(file_path: str) -> bool:
-    """Check if the file format is directly supported by soundfile."""
-    try:
-        info = sf.info(file_path)
-        return True
-    except Exception:
-        return False
 
-
-def convert_to_wav(input_file: str, output_file: Optional[str] = None) -> Tuple[str, bool]:
+def prepare_audio(input_file: str, output_file: Optional[str] = None) -> Tuple[str, float, bool]:
     """
-    Convert audio file to WAV format if needed.
+    Probe an audio file once and convert it to mono 16 kHz WAV if needed.
     
     Args:
         input_file: Path to the input audio file
         output_file: Optional path for the output WAV file. If None, creates a temporary file.
         
     Returns:
-        Tuple of (output_file_path, is_temporary) where is_temporary indicates if a temp file was created
+        Tuple of (wav_path, duration, is_temporary) where duration is in seconds
+        and is_temporary indicates if a temp file was created
     """
-    input_path = Path(input_file)
+    try:
+        info = sf.info(input_file)
+    except Exception:
+        info = None
     
-    # Check if file is already supported by soundfile
-    if is_supported_by_soundfile(input_file):
-        return input_file, False
+    # Use the file as is only if it is already mono 16 kHz
+    if info is not None and info.samplerate == SAMPLE_RATE and info.channels == 1:
+        return input_file, info.duration, False
     
     # Need to convert the file
     if output_file is None:
@@ -43,24 +44,88 @@ def convert_to_wav(input_file: str, output_file: Optional[str] = None) -> Tuple[
     else:
         is_temporary = False
     
+    try:
+        duration = _convert(input_file, output_file)
+    except BaseException:
+        # Don't leave a half-written temporary file behind
+        if is_temporary:
+            os.unlink(output_file)
+        raise
+    
+    return output_file, duration, is_temporary
+
+
+def _convert(input_file: str, output_file: str) -> float:
+    """Write input_file to output_file as mono 16 kHz WAV and return its duration."""
+    if shutil.which("ffmpeg"):
+        # Stream decode straight to mono 16 kHz WAV, the format both models expect
+        subprocess.run(
+            [
+                "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+                "-i", input_file,
+                "-ac", "1", "-ar", str(SAMPLE_RATE),
+                "-f", "wav", output_file,
+            ],
+            check=True
+        )
+        # Only the WAV header is read here
+        return sf.info(output_file).duration
+    
     # Load audio using pydub (supports MP4, MP3, etc via ffmpeg)
     audio = AudioSegment.from_file(input_file)
+    audio = audio.set_channels(1).set_frame_rate(SAMPLE_RATE)
     
     # Export as WAV
     audio.export(output_file, format="wav")
     
-    return output_file, is_temporary
+    return len(audio) / 1000.0  # Convert milliseconds to seconds
+
+
+def load_audio(file_path: str, max_seconds: Optional[float] = None) -> torch.Tensor:
+    """
+    Decode an audio file once into a mono 16 kHz waveform.
+    
+    Args:
+        file_path: Path to an audio file readable by soundfile
+        max_seconds: Optional limit on the number of seconds to keep
+        
+    Returns:
+        Float tensor of shape (1, num_samples) sampled at SAMPLE_RATE
+    """
+    with sf.SoundFile(file_path) as f:
+        sample_rate = f.samplerate
+        # Read only the requested window, as float32 rather than float64
+        frames = -1 if max_seconds is None else int(max_seconds * sample_rate)
+        data = f.read(frames=frames, dtype="float32", always_2d=True)
+    
+    # (samples, channels) -> (channels, samples) without copying
+    waveform = torch.from_numpy(data.T)
+    
+    if waveform.shape[0] > 1:
+        waveform = waveform.mean(dim=0, keepdim=True)
+    
+    if sample_rate != SAMPLE_RATE:
+        waveform = torchaudio.functional.resample(waveform, sample_rate, SAMPLE_RATE)
+    
+    return waveform
 
 
-def get_audio_duration(file_path: str) -> float:
+def decode_input(input_file: str, max_seconds: Optional[float] = None) -> Tuple[torch.Tensor, float]:
     """
-    Get duration of an audio file in seconds.
-    Supports all formats that pydub can handle.
+    Prepare and decode an input file, removing any intermediate WAV.
+    
+    Args:
+        input_file: Path to the input audio or video file
+        max_seconds: Optional limit on the number of seconds to decode
+        
+    Returns:
+        Tuple of (waveform, duration) where waveform is as returned by load_audio
+        and duration is the full length of the input in seconds
     """
-    if is_supported_by_soundfile(file_path):
-        info = sf.info(file_path)
-        return info.duration
-    else:
-        # Use pydub for unsupported formats
-        audio = AudioSegment.from_file(file_path)
-        return len(audio) / 1000.0  # Convert milliseconds to seconds
\ No newline at end of file
+    wav_path, duration, is_temporary = prepare_audio(input_file)
+    try:
+        return load_audio(wav_path, max_seconds=max_seconds), duration
+    finally:
+        # The decoded samples live in memory, so the WAV is no longer needed
+        if is_temporary:
+            os.unlink(wav_path)
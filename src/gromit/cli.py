@@ -1,6 +1,10 @@
 """CLI interface for Gromit."""
 
 import click
+import contextlib
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from rich.console import Console
 from rich.progress import (
@@ -18,11 +22,72 @@ from dotenv import load_dotenv
 
 from gromit import __version__
 
-# Load environment variables
+# Load environment variables once for the whole CLI (modules read os.environ lazily)
 load_dotenv()
 
 console = Console()
 
+# File extensions picked up by the batch command
+AUDIO_EXTENSIONS = {
+    ".wav", ".flac", ".ogg", ".mp3", ".m4a", ".aac",
+    ".mp4", ".mov", ".mkv", ".webm",
+}
+
+
+# Options shared by the transcribe and batch commands
+_MODEL_OPTIONS = [
+    click.option(
+        "-l",
+        "--language",
+        default=os.getenv("DEFAULT_LANGUAGE", "en"),
+        help=f"Language code (e.g., 'en' for English, 'uk' for Ukrainian). Default: {os.getenv('DEFAULT_LANGUAGE', 'en')}",
+    ),
+    click.option(
+        "--device",
+        type=click.Choice(["auto", "cpu", "cuda", "mps"]),
+        default=os.getenv("DEFAULT_DEVICE", "auto"),
+        help=f"Device to use for inference. Default: {os.getenv('DEFAULT_DEVICE', 'auto')}",
+    ),
+    click.option(
+        "-v",
+        "--verbose",
+        is_flag=True,
+        help="Enable verbose logging",
+    ),
+    click.option(
+        "--max-seconds",
+        type=float,
+        help="Only transcribe first X seconds (for debugging/testing)",
+    ),
+    click.option(
+        "--batch-size",
+        type=click.IntRange(min=1),
+        help="Audio chunks transcribed per batch. Default: 8 on CUDA, 4 on CPU",
+    ),
+    click.option(
+        "--compute-type",
+        type=click.Choice(["int8", "int8_float16", "int8_float32", "float16", "float32"]),
+        help="Whisper quantization type. Default: int8_float16 on CUDA, int8 on CPU",
+    ),
+    click.option(
+        "--seg-batch",
+        type=click.IntRange(min=1),
+        help="Diarization segmentation batch size. Default: from the pyannote pipeline config",
+    ),
+    click.option(
+        "--emb-batch",
+        type=click.IntRange(min=1),
+        help="Diarization embedding batch size. Default: from the pyannote pipeline config",
+    ),
+]
+
+
+def _model_options(func):
+    """Apply the shared model options to a command."""
+    for option in reversed(_MODEL_OPTIONS):
+        func = option(func)
+    return func
+
 
 @click.group()
 @click.version_option(version=__version__, prog_name="gromit")
@@ -39,30 +104,11 @@ def cli():
     type=click.Path(path_type=Path),
     help="Output file path. Defaults to input_transcript.txt",
 )
-@click.option(
-    "-l",
-    "--language",
-    default=os.getenv("DEFAULT_LANGUAGE", "en"),
-    help=f"Language code (e.g., 'en' for English, 'uk' for Ukrainian). Default: {os.getenv('DEFAULT_LANGUAGE', 'en')}",
-)
-@click.option(
-    "--device",
-    type=click.Choice(["auto", "cpu", "cuda", "mps"]),
-    default=os.getenv("DEFAULT_DEVICE", "auto"),
-    help=f"Device to use for inference. Default: {os.getenv('DEFAULT_DEVICE', 'auto')}",
-)
-@click.option(
-    "-v",
-    "--verbose",
-    is_flag=True,
-    help="Enable verbose logging",
-)
-@click.option(
-    "--max-seconds",
-    type=float,
-    help="Only transcribe first X seconds (for debugging/testing)",
-)
-def transcribe(input_file, output, language, device, verbose, max_seconds):
+@_model_options
+def transcribe(
+    input_file, output, language, device, verbose, max_seconds,
+    batch_size, compute_type, seg_batch, emb_batch
+):
     """Transcribe audio file with speaker diarization."""
     
     # Set output path if not provided
@@ -78,16 +124,11 @@ def transcribe(input_file, output, language, device, verbose, max_seconds):
         # Import here to avoid slow startup
         from gromit.transcriber import transcribe_audio
         from gromit.diarizer import diarize_audio
-        from gromit.audio_utils import convert_to_wav, get_audio_duration
-        import soundfile as sf
-        import tempfile
+        from gromit.audio_utils import SAMPLE_RATE, decode_input
         
-        # Convert to WAV if needed (for MP4, MP3, etc.)
-        converted_file, is_temporary = convert_to_wav(str(input_file))
-        working_file = Path(converted_file)
-        
-        # Get audio duration for progress estimation
-        full_duration = get_audio_duration(str(input_file))
+        # Convert if needed (for MP4, MP3, etc.) and decode once; the samples
+        # are shared between diarization and transcription
+        waveform, full_duration = decode_input(str(input_file), max_seconds=max_seconds)
         
         # Use max_seconds if specified
         if max_seconds:
@@ -113,29 +154,50 @@ def transcribe(input_file, output, language, device, verbose, max_seconds):
             TextColumn("elapsed"),
             console=console,
         ) as progress:
-            # Step 1: Diarization
+            # Diarization and transcription are independent, so run them side by side
             task1 = progress.add_task(
                 "[cyan]Analyzing speakers (this may take a few minutes)...", 
                 total=None  # Indeterminate progress
             )
-            
-            speaker_segments = diarize_audio(working_file, device=device, max_seconds=max_seconds)
-            progress.update(task1, description="[green]✓ Speaker diarization complete")
-            
-            # Step 2: Transcription
             task2 = progress.add_task(
                 f"[green]Transcribing {duration/60:.1f} minutes of audio...", 
-                total=None  # Use indeterminate progress since we can't track it
+                total=duration  # Advanced as each segment is decoded
             )
             
-            transcription = transcribe_audio(
-                working_file, 
-                language=language, 
-                device=device,
-                verbose=verbose,
-                max_seconds=max_seconds
-            )
-            progress.update(task2, description="[green]✓ Transcription complete")
+            # Both workers only read the shared waveform, so no lock is needed
+            executor = ThreadPoolExecutor(max_workers=2)
+            try:
+                diarization_future = executor.submit(
+                    diarize_audio,
+                    {"waveform": waveform, "sample_rate": SAMPLE_RATE},
+                    device=device,
+                    segmentation_batch_size=seg_batch,
+                    embedding_batch_size=emb_batch
+                )
+                transcription_future = executor.submit(
+                    transcribe_audio,
+                    waveform.squeeze(0).numpy(), 
+                    language=language, 
+                    device=device,
+                    verbose=verbose,
+                    batch_size=batch_size,
+                    compute_type=compute_type,
+                    on_segment=lambda segment: progress.update(
+                        task2, completed=min(segment["end"], duration)
+                    )
+                )
+                diarization_future.add_done_callback(_mark_task_done(
+                    progress, task1, "Speaker diarization"
+                ))
+                transcription_future.add_done_callback(_mark_task_done(
+                    progress, task2, "Transcription", completed=duration
+                ))
+                
+                speaker_segments = diarization_future.result()
+                transcription = transcription_future.result()
+            finally:
+                # Don't wait for a model that is still running after an error or Ctrl+C
+                executor.shutdown(wait=False, cancel_futures=True)
             
             # Step 3: Merge and format
             task3 = progress.add_task("[yellow]Formatting output...", total=None)
@@ -147,18 +209,258 @@ def transcribe(input_file, output, language, device, verbose, max_seconds):
         output.write_text(formatted_text, encoding="utf-8")
         console.print(f"[green]✓[/green] Transcription saved to {output}")
         
-        # Clean up temporary file if created
-        if is_temporary:
-            os.unlink(converted_file)
-        
     except KeyboardInterrupt:
         console.print("\n[yellow]Interrupted by user[/yellow]")
-        sys.exit(1)
+        _exit_now(1)
     except Exception as e:
         console.print(f"[red]Error:[/red] {str(e)}")
         if verbose:
             console.print_exception()
+        _exit_now(1)
+
+
+def _exit_now(code):
+    """
+    Exit without joining worker threads.
+    
+    A model still running in a worker thread can't be interrupted, and
+    sys.exit would wait for it to finish at interpreter shutdown.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+
+def _mark_task_done(progress, task_id, name, **fields):
+    """Build a future callback that marks a progress task as finished or failed."""
+    def callback(future):
+        if future.cancelled():
+            return
+        if future.exception() is None:
+            progress.update(task_id, description=f"[green]✓ {name} complete", **fields)
+        else:
+            progress.update(task_id, description=f"[red]✗ {name} failed")
+    return callback
+
+
+def _transcript_paths(input_files, output_dir):
+    """
+    Map each input file to its transcript path in output_dir.
+    
+    Files sharing a stem (e.g. meeting.mp3 and meeting.wav) keep their
+    extension in the transcript name so they don't overwrite each other.
+    """
+    stem_counts = {}
+    for input_file in input_files:
+        stem = input_file.stem.lower()
+        stem_counts[stem] = stem_counts.get(stem, 0) + 1
+    
+    outputs = {}
+    for input_file in input_files:
+        if stem_counts[input_file.stem.lower()] > 1:
+            name = f"{input_file.stem}_{input_file.suffix.lstrip('.')}_transcript.txt"
+        else:
+            name = f"{input_file.stem}_transcript.txt"
+        outputs[input_file] = output_dir / name
+    
+    # Compare case-insensitively for macOS/Windows filesystems
+    names = [output.name.lower() for output in outputs.values()]
+    if len(set(names)) != len(names):
+        raise click.ClickException(
+            "Input files would produce clashing transcript names; rename them and retry"
+        )
+    
+    return outputs
+
+
+def _stop_executor(executor):
+    """Drop queued files and stop the ones in progress without waiting for them."""
+    # ProcessPoolExecutor has no public way to stop running tasks, and
+    # shutdown() clears its process table, so grab the workers first
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def _load_models_once(device, compute_type, cpu_threads):
+    """Set the thread budget and warm the model caches once per batch worker process."""
+    import torch
+    from gromit.transcriber import get_device, load_model
+    from gromit.diarizer import load_pipeline
+    
+    # Ctrl+C is handled by the main process, which stops the workers; otherwise
+    # each worker would treat it as a failed file and move on to the next one
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    # Each worker gets its share of the cores; its models run one after another
+    torch.set_num_threads(cpu_threads)
+    
+    whisper_device, _ = get_device(device)
+    load_model(whisper_device, compute_type=compute_type, cpu_threads=cpu_threads)
+    try:
+        load_pipeline(device)
+    except Exception:
+        # diarize_audio reports the failure and falls back per file
+        pass
+
+
+def _transcribe_file(
+    input_file,
+    output,
+    language,
+    device,
+    max_seconds,
+    batch_size,
+    compute_type,
+    seg_batch,
+    emb_batch,
+    model_lock=None,
+    cpu_threads=None
+):
+    """Convert, diarize, transcribe and format a single file for the batch command."""
+    from gromit.transcriber import transcribe_audio
+    from gromit.diarizer import diarize_audio
+    from gromit.formatter import format_conversation
+    from gromit.audio_utils import SAMPLE_RATE, decode_input
+    
+    waveform, _ = decode_input(str(input_file), max_seconds=max_seconds)
+    
+    # Serialize model stages that share a GPU so concurrent files don't OOM
+    with model_lock or contextlib.nullcontext():
+        speaker_segments = diarize_audio(
+            {"waveform": waveform, "sample_rate": SAMPLE_RATE},
+            device=device,
+            segmentation_batch_size=seg_batch,
+            embedding_batch_size=emb_batch
+        )
+        transcription = transcribe_audio(
+            waveform.squeeze(0).numpy(),
+            language=language,
+            device=device,
+            batch_size=batch_size,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads
+        )
+    
+    output.write_text(format_conversation(transcription, speaker_segments), encoding="utf-8")
+    return output
+
+
+@cli.command()
+@click.argument("input_dir", type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option(
+    "-o",
+    "--output-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Directory for transcripts. Defaults to the input directory",
+)
+@_model_options
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="Number of files processed in parallel",
+)
+def batch(
+    input_dir, output_dir, language, device, workers, verbose, max_seconds,
+    batch_size, compute_type, seg_batch, emb_batch
+):
+    """Transcribe every audio file in a directory, loading models once."""
+    
+    input_files = sorted(
+        path for path in input_dir.iterdir()
+        if path.is_file() and path.suffix.lower() in AUDIO_EXTENSIONS
+    )
+    if not input_files:
+        console.print(f"[yellow]No audio files found in {input_dir}[/yellow]")
+        return
+    
+    if output_dir is None:
+        output_dir = input_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outputs = _transcript_paths(input_files, output_dir)
+    
+    console.print(f"[bold blue]Gromit v{__version__}[/bold blue]")
+    console.print(f"Input: {input_dir} ({len(input_files)} files)")
+    console.print(f"Output: {output_dir}")
+    console.print(f"Language: {language}")
+    console.print()
+    
+    import torch
+    
+    # CUDA work serializes on the device anyway, so share one set of models
+    # between threads; on CPU use processes, each with its own loaded models
+    if device in ("auto", "cuda") and torch.cuda.is_available():
+        executor = ThreadPoolExecutor(max_workers=workers)
+        model_lock = threading.Lock()
+        cpu_threads = None
+    else:
+        # Split the cores between workers so they don't oversubscribe the CPU
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_load_models_once,
+            initargs=(device, compute_type, cpu_threads)
+        )
+        model_lock = None
+    
+    failed = 0
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TextColumn("•"),
+            TimeElapsedColumn(),
+            TextColumn("elapsed"),
+            console=console,
+        ) as progress:
+            task = progress.add_task("[cyan]Transcribing files...", total=len(input_files))
+            
+            futures = {
+                executor.submit(
+                    _transcribe_file,
+                    input_file,
+                    outputs[input_file],
+                    language,
+                    device,
+                    max_seconds,
+                    batch_size,
+                    compute_type,
+                    seg_batch,
+                    emb_batch,
+                    model_lock,
+                    cpu_threads
+                ): input_file
+                for input_file in input_files
+            }
+            
+            for future in as_completed(futures):
+                input_file = futures[future]
+                try:
+                    output = future.result()
+                    progress.console.print(f"[green]✓[/green] {input_file.name} → {output}")
+                except Exception as e:
+                    failed += 1
+                    progress.console.print(f"[red]✗[/red] {input_file.name}: {str(e)}")
+                    if verbose:
+                        progress.console.print_exception()
+                progress.advance(task)
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Interrupted by user[/yellow]")
+        _stop_executor(executor)
+        _exit_now(1)
+    
+    executor.shutdown()
+    
+    if failed:
+        console.print(f"[red]{failed} of {len(input_files)} files failed[/red]")
         sys.exit(1)
+    console.print(f"[green]✓[/green] Transcribed {len(input_files)} files")
 
 
 def main():
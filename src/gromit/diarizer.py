@@ -1,45 +1,151 @@
 """Speaker diarization module using pyannote.audio."""
 
-from pathlib import Path
+import functools
 from typing import List, Dict, Optional
 import torch
 import warnings
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
 
+# Set once pyannote hits an op MPS does not implement; later calls use CPU
+_mps_unsupported = False
+
+# Batch sizes from each cached pipeline's config, restored when no override is given
+_default_batch_sizes = {}
+
+
+@functools.lru_cache(maxsize=4)
+def _get_pyannote(device: torch.device, hf_token: str):
+    """Load the pyannote pipeline once per device and move it there."""
+    from pyannote.audio import Pipeline
+    
+    pipeline = Pipeline.from_pretrained(
+        "pyannote/speaker-diarization-3.1",
+        use_auth_token=hf_token
+    )
+    pipeline.to(device)
+    _default_batch_sizes[(device, hf_token)] = (
+        pipeline.segmentation_batch_size, pipeline.embedding_batch_size
+    )
+    return pipeline
+
+
+def _resolve_device(device: str) -> torch.device:
+    """
+    Determine the torch device to run the pipeline on.
+    
+    Unlike faster-whisper, pyannote runs on MPS, so Apple Silicon uses the GPU
+    for diarization unless MPS already failed in this session.
+    """
+    mps_usable = torch.backends.mps.is_available() and not _mps_unsupported
+    
+    if device == "auto":
+        if torch.cuda.is_available():
+            return torch.device("cuda")
+        elif mps_usable:
+            return torch.device("mps")
+        else:
+            return torch.device("cpu")
+    
+    if device == "mps" and not mps_usable:
+        if not _mps_unsupported:
+            print("Warning: MPS not available. Falling back to CPU for diarization.")
+        return torch.device("cpu")
+    
+    return torch.device(device)
+
+
+def _disable_mps() -> None:
+    """Remember for the rest of the session that pyannote cannot run on MPS."""
+    global _mps_unsupported
+    _mps_unsupported = True
+
+
+def _is_unsupported_mps_op(error: Exception) -> bool:
+    """Check whether an error comes from an operator MPS does not implement."""
+    if isinstance(error, NotImplementedError):
+        return True
+    message = str(error)
+    return "not implemented" in message.lower() and ("MPS" in message or "aten::" in message)
+
+
+def _run_pipeline(
+    audio: Dict,
+    device: torch.device,
+    hf_token: str,
+    diarization_params: Dict,
+    segmentation_batch_size: Optional[int],
+    embedding_batch_size: Optional[int]
+):
+    """Run the cached pipeline for the given device on preloaded audio."""
+    pipeline = _get_pyannote(device, hf_token)
+    
+    # The pipeline is shared, so set both batch sizes on every call to keep an
+    # earlier override from leaking into calls that want the config defaults
+    default_seg, default_emb = _default_batch_sizes[(device, hf_token)]
+    pipeline.segmentation_batch_size = (
+        segmentation_batch_size if segmentation_batch_size is not None else default_seg
+    )
+    pipeline.embedding_batch_size = (
+        embedding_batch_size if embedding_batch_size is not None else default_emb
+    )
+    
+    # Pass preloaded audio so pyannote skips its own file IO and resampling
+    return pipeline(
+        {"waveform": audio["waveform"].to(device), "sample_rate": audio["sample_rate"]},
+        **diarization_params
+    )
+
+
+def load_pipeline(device: str = "auto", hf_token: Optional[str] = None):
+    """
+    Load (or reuse) the diarization pipeline ahead of time.
+    
+    Returns None when no Hugging Face token is available, in which case
+    diarize_audio falls back to simple speaker detection.
+    """
+    if hf_token is None:
+        hf_token = os.getenv("HUGGING_FACE_HUB_TOKEN", None)
+    
+    if hf_token is None:
+        return None
+    
+    return _get_pyannote(_resolve_device(device), hf_token)
+
 
 def diarize_audio(
-    audio_path: Path,
+    audio: Dict,
     device: str = "auto",
     num_speakers: Optional[int] = None,
     min_speakers: Optional[int] = None,
     max_speakers: Optional[int] = None,
     hf_token: Optional[str] = None,
-    max_seconds: Optional[float] = None
+    segmentation_batch_size: Optional[int] = None,
+    embedding_batch_size: Optional[int] = None
 ) -> List[Dict]:
     """
-    Perform speaker diarization on audio file.
+    Perform speaker diarization on decoded audio.
     
     Args:
-        audio_path: Path to audio file
+        audio: Dictionary with mono "waveform" tensor and its "sample_rate"
         device: Device to use ('auto', 'cpu', 'cuda', 'mps')
         num_speakers: Exact number of speakers (if known)
         min_speakers: Minimum number of speakers
         max_speakers: Maximum number of speakers
         hf_token: Hugging Face token for model access
+        segmentation_batch_size: Sliding windows segmented per forward pass
+                                 (defaults to the pyannote pipeline config)
+        embedding_batch_size: Speaker embeddings computed per forward pass
+                              (defaults to the pyannote pipeline config)
         
     Returns:
         List of speaker segments with start/end times and speaker labels
     """
     # Import here to avoid issues if user hasn't set up HF token yet
     try:
-        from pyannote.audio import Pipeline
+        import pyannote.audio  # noqa: F401
     except ImportError as e:
         raise ImportError(
             "pyannote.audio is required for speaker diarization. "
@@ -53,57 +159,18 @@ def diarize_audio(
     if hf_token is None:
         # Return simple fallback if no token
         print("Warning: No Hugging Face token found. Using simple speaker detection.")
-        return _simple_speaker_segments(audio_path, max_seconds)
+        return _simple_speaker_segments(audio)
     
     # Debug mode
     if os.getenv("DEBUG", "false").lower() == "true":
         print(f"Using HF token: {hf_token[:10]}..." if hf_token else "No token")
     
-    # Handle max_seconds by creating temporary clip
-    audio_to_process = str(audio_path)
-    if max_seconds is not None:
-        import tempfile
-        import soundfile as sf
-        
-        if os.getenv("DEBUG", "false").lower() == "true":
-            print(f"Creating temporary clip for diarization: first {max_seconds} seconds...")
-        
-        # Read original audio
-        data, sample_rate = sf.read(str(audio_path))
-        max_samples = int(max_seconds * sample_rate)
-        
-        # Trim to max_seconds
-        if len(data) > max_samples:
-            data = data[:max_samples]
-        
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        sf.write(temp_file.name, data, sample_rate)
-        audio_to_process = temp_file.name
-    
-    # Determine device
-    if device == "auto":
-        if torch.cuda.is_available():
-            device = torch.device("cuda")
-        elif torch.backends.mps.is_available():
-            device = torch.device("cpu")  # MPS can have issues with pyannote
-        else:
-            device = torch.device("cpu")
-    else:
-        device = torch.device(device)
+    device = _resolve_device(device)
     
     try:
         # Load pretrained pipeline
         if os.getenv("DEBUG", "false").lower() == "true":
             print("Loading speaker diarization model...")
-            
-        pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization-3.1",
-            use_auth_token=hf_token
-        )
-        
-        # Move to device
-        pipeline.to(device)
         
         # Set number of speakers if provided
         diarization_params = {}
@@ -113,8 +180,20 @@ def diarize_audio(
             diarization_params["min_speakers"] = min_speakers
             diarization_params["max_speakers"] = max_speakers
         
-        # Run diarization
-        diarization = pipeline(audio_to_process, **diarization_params)
+        pipeline_args = (
+            hf_token, diarization_params, segmentation_batch_size, embedding_batch_size
+        )
+        try:
+            diarization = _run_pipeline(audio, device, *pipeline_args)
+        except (NotImplementedError, RuntimeError) as e:
+            # Some aten ops are not implemented for MPS; retry those on CPU
+            # but let anything else (e.g. out of memory) surface as usual
+            if device.type != "mps" or not _is_unsupported_mps_op(e):
+                raise
+            print(f"Warning: Diarization failed on MPS ({e}). Falling back to CPU.")
+            _disable_mps()
+            device = torch.device("cpu")
+            diarization = _run_pipeline(audio, device, *pipeline_args)
         
         # Convert to list of segments
         segments = []
@@ -136,16 +215,6 @@ def diarize_audio(
                 speaker_mapping[segment["speaker"]] = f"Speaker {len(speaker_mapping) + 1}"
             segment["speaker"] = speaker_mapping[segment["speaker"]]
         
-        # Cleanup temporary file if created
-        if max_seconds is not None and audio_to_process != str(audio_path):
-            try:
-                os.unlink(audio_to_process)
-                if os.getenv("DEBUG", "false").lower() == "true":
-                    print(f"Cleaned up diarization temporary file: {audio_to_process}")
-            except Exception as e:
-                if os.getenv("DEBUG", "false").lower() == "true":
-                    print(f"Warning: Could not cleanup diarization temp file: {e}")
-        
         return segments
         
     except Exception as e:
@@ -157,29 +226,16 @@ def diarize_audio(
         print("3. Check that your token is correctly set in .env file")
         print("\nFalling back to simple speaker detection.\n")
         
-        # Cleanup temporary file if created before falling back
-        if max_seconds is not None and 'audio_to_process' in locals() and audio_to_process != str(audio_path):
-            try:
-                os.unlink(audio_to_process)
-            except:
-                pass
-                
-        return _simple_speaker_segments(audio_path, max_seconds)
+        return _simple_speaker_segments(audio)
 
 
-def _simple_speaker_segments(audio_path: Path, max_seconds: Optional[float] = None) -> List[Dict]:
+def _simple_speaker_segments(audio: Dict) -> List[Dict]:
     """
     Simple fallback speaker segmentation based on silence.
     Returns a single speaker for the entire audio.
     """
-    import soundfile as sf
-    
-    # Get audio duration
-    info = sf.info(str(audio_path))
-    full_duration = info.duration
-    
-    # Use max_seconds if specified
-    duration = min(max_seconds, full_duration) if max_seconds else full_duration
+    # Audio is already trimmed to max_seconds by the caller
+    duration = audio["waveform"].shape[-1] / audio["sample_rate"]
     
     # Return single speaker segment
     return [{
@@ -205,17 +261,29 @@ def merge_speaker_segments(segments: List[Dict], min_gap: float = 0.5) -> List[D
         return []
     
     merged = []
-    current = segments[0].copy()
+    cur_start = segments[0]["start"]
+    cur_end = segments[0]["end"]
+    cur_speaker = segments[0]["speaker"]
     
     for segment in segments[1:]:
         # If same speaker and gap is small, merge
-        if (segment["speaker"] == current["speaker"] and 
-            segment["start"] - current["end"] < min_gap):
-            current["end"] = segment["end"]
-            current["duration"] = current["end"] - current["start"]
+        if segment["speaker"] == cur_speaker and segment["start"] - cur_end < min_gap:
+            cur_end = segment["end"]
         else:
-            merged.append(current)
-            current = segment.copy()
+            merged.append({
+                "start": cur_start,
+                "end": cur_end,
+                "speaker": cur_speaker,
+                "duration": cur_end - cur_start
+            })
+            cur_start = segment["start"]
+            cur_end = segment["end"]
+            cur_speaker = segment["speaker"]
     
-    merged.append(current)
+    merged.append({
+        "start": cur_start,
+        "end": cur_end,
+        "speaker": cur_speaker,
+        "duration": cur_end - cur_start
+    })
     return merged
\ No newline at end of file
@@ -1,8 +1,15 @@
 """Format transcription with speaker information."""
 
 from typing import List, Dict
+import numpy as np
 from gromit.diarizer import merge_speaker_segments
 
+# Optional: compile the alignment kernel when numba is installed
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 
 def format_conversation(
     transcription: Dict,
@@ -31,19 +38,18 @@ def format_conversation(
     if not speaker_segments or len(speaker_segments) == 1:
         return _format_single_speaker(transcription)
     
-    # Align transcription segments with speaker segments
-    aligned_segments = _align_segments(
+    # Assign a speaker to each transcription segment
+    speakers = _speaker_labels(
         transcription["segments"], 
         speaker_segments
     )
     
-    # Format output
-    lines = []
+    # Format output, one block per speaker turn
+    blocks = []
     current_speaker = None
     current_text = []
     
-    for segment in aligned_segments:
-        speaker = segment["speaker"]
+    for segment, speaker in zip(transcription["segments"], speakers):
         text = segment["text"].strip()
         
         if not text:
@@ -52,8 +58,7 @@ def format_conversation(
         if speaker != current_speaker:
             # Output previous speaker's text
             if current_speaker and current_text:
-                lines.append(f"{current_speaker}: {' '.join(current_text)}")
-                lines.append("")  # Empty line between speakers
+                blocks.append(f"{current_speaker}: {' '.join(current_text)}")
             
             current_speaker = speaker
             current_text = [text]
@@ -62,9 +67,10 @@ def format_conversation(
     
     # Don't forget the last speaker
     if current_speaker and current_text:
-        lines.append(f"{current_speaker}: {' '.join(current_text)}")
+        blocks.append(f"{current_speaker}: {' '.join(current_text)}")
     
-    return "\n".join(lines)
+    # Empty line between speakers
+    return "\n\n".join(blocks)
 
 
 def _format_single_speaker(transcription: Dict) -> str:
@@ -88,26 +94,141 @@ def _align_segments(
     
     Returns list of segments with both text and speaker information.
     """
-    aligned = []
+    speakers = _speaker_labels(transcription_segments, speaker_segments)
     
-    for trans_seg in transcription_segments:
-        # Find the speaker segment that contains this transcription
-        trans_mid = (trans_seg["start"] + trans_seg["end"]) / 2
-        
-        speaker = "Unknown"
-        for speaker_seg in speaker_segments:
-            if speaker_seg["start"] <= trans_mid <= speaker_seg["end"]:
-                speaker = speaker_seg["speaker"]
-                break
-        
-        aligned.append({
+    return [
+        {
             "start": trans_seg["start"],
             "end": trans_seg["end"],
             "text": trans_seg["text"],
             "speaker": speaker
-        })
+        }
+        for trans_seg, speaker in zip(transcription_segments, speakers)
+    ]
+
+
+def _speaker_labels(
+    transcription_segments: List[Dict],
+    speaker_segments: List[Dict]
+) -> List[str]:
+    """
+    Find the speaker label for each transcription segment.
+    
+    Speaker segments must be sorted by start time. Each transcription
+    segment is assigned to the first speaker segment containing its
+    midpoint, or "Unknown" if there is none.
+    """
+    if not transcription_segments:
+        return []
+    
+    starts, ends, kept = _disjoint_intervals(
+        _field_array(speaker_segments, "start"),
+        _field_array(speaker_segments, "end")
+    )
+    
+    # Index -1 (no containing segment) maps to the trailing "Unknown" label
+    speaker_labels = [speaker_segments[k]["speaker"] for k in kept.tolist()] + ["Unknown"]
+    
+    idx = _align_segments_numeric(
+        _field_array(transcription_segments, "start"),
+        _field_array(transcription_segments, "end"),
+        starts,
+        ends
+    )
+    
+    return [speaker_labels[i] for i in idx.tolist()]
+
+
+def _field_array(segments: List[Dict], field: str) -> np.ndarray:
+    """Collect one numeric field of a list of segments into a float64 array."""
+    return np.fromiter(
+        (seg[field] for seg in segments),
+        dtype=np.float64,
+        count=len(segments)
+    )
+
+
+def _disjoint_intervals(starts: np.ndarray, ends: np.ndarray):
+    """
+    Trim overlapping speaker turns so that earlier turns take precedence.
     
-    return aligned
+    pyannote emits overlapping turns when people talk over each other. Each
+    turn is clipped to start where the previous turns end, and turns fully
+    covered by earlier ones are dropped. A point then falls in the same turn
+    as the first original turn containing it, and the kept ends are strictly
+    increasing, so they can be binary searched.
+    
+    Returns:
+        Tuple of (starts, ends, kept) where kept holds the original indices
+    """
+    prev_max_end = np.empty_like(ends)
+    prev_max_end[:1] = -np.inf
+    np.maximum.accumulate(ends[:-1], out=prev_max_end[1:])
+    
+    kept = np.flatnonzero(ends > prev_max_end)
+    return np.maximum(starts, prev_max_end)[kept], ends[kept], kept
+
+
+def _align_segments_numpy(
+    trans_starts: np.ndarray,
+    trans_ends: np.ndarray,
+    spk_starts: np.ndarray,
+    spk_ends: np.ndarray
+) -> np.ndarray:
+    """
+    Index of the speaker interval containing each transcription midpoint, or -1.
+    
+    Speaker intervals must come from _disjoint_intervals. Pure NumPy
+    fallback for when numba is not installed.
+    """
+    mids = (trans_starts + trans_ends) / 2
+    
+    # First speaker interval ending at or after each midpoint
+    idx = np.searchsorted(spk_ends, mids, side="left")
+    valid = idx < spk_ends.shape[0]
+    valid[valid] = spk_starts[idx[valid]] <= mids[valid]
+    
+    return np.where(valid, idx, -1)
+
+
+def _align_segments_loop(
+    trans_starts: np.ndarray,
+    trans_ends: np.ndarray,
+    spk_starts: np.ndarray,
+    spk_ends: np.ndarray
+) -> np.ndarray:
+    """
+    Index of the speaker interval containing each transcription midpoint, or -1.
+    
+    Same result as _align_segments_numpy, written as a plain binary search
+    so numba can compile it.
+    """
+    n = trans_starts.shape[0]
+    m = spk_ends.shape[0]
+    idx = np.empty(n, dtype=np.int64)
+    
+    for i in range(n):
+        mid = (trans_starts[i] + trans_ends[i]) / 2
+        
+        # First speaker interval ending at or after mid
+        lo = 0
+        hi = m
+        while lo < hi:
+            pivot = (lo + hi) // 2
+            if spk_ends[pivot] < mid:
+                lo = pivot + 1
+            else:
+                hi = pivot
+        
+        idx[i] = lo if lo < m and spk_starts[lo] <= mid else -1
+    
+    return idx
+
+
+if njit is not None:
+    _align_segments_numeric = njit(cache=True, boundscheck=False)(_align_segments_loop)
+else:
+    _align_segments_numeric = _align_segments_numpy
 
 
 def format_with_timestamps(
@@ -124,26 +245,21 @@ def format_with_timestamps(
         speaker_segments
     )
     
-    lines = []
-    for segment in aligned_segments:
-        start = _format_timestamp(segment["start"])
-        end = _format_timestamp(segment["end"])
-        speaker = segment["speaker"]
-        text = segment["text"].strip()
-        
-        if text:
-            lines.append(f"[{start} - {end}] {speaker}: {text}")
+    lines = [
+        f"[{_format_timestamp(segment['start'])} - {_format_timestamp(segment['end'])}] "
+        f"{segment['speaker']}: {text}"
+        for segment in aligned_segments
+        if (text := segment["text"].strip())
+    ]
     
     return "\n".join(lines)
 
 
 def _format_timestamp(seconds: float) -> str:
     """Format seconds as HH:MM:SS."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
     
-    if hours > 0:
+    if hours:
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
-    else:
-        return f"{minutes:02d}:{secs:02d}"
\ No newline at end of file
+    return f"{minutes:02d}:{secs:02d}"
\ No newline at end of file
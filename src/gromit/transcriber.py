@@ -1,19 +1,22 @@
 """Transcription module using faster-whisper."""
 
+import functools
+import io
 from pathlib import Path
+import numpy as np
 import torch
-from faster_whisper import WhisperModel
-from typing import Dict, List, Optional
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 import warnings
 import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 # Suppress specific warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
+# Whisper model download directory, resolved once
+_MODEL_CACHE = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "whisper"
+_MODEL_CACHE.mkdir(parents=True, exist_ok=True)
+
 
 def get_device(device: str = "auto") -> tuple[str, bool]:
     """
@@ -45,89 +48,60 @@ def get_device(device: str = "auto") -> tuple[str, bool]:
     return device, False
 
 
-def transcribe_audio(
-    audio_path: Path, 
-    language: str = "en",
-    device: str = "auto",
-    model_size: str = None,
+@functools.lru_cache(maxsize=4)
+def _get_whisper(model_size: str, device: str, compute_type: str, cpu_threads: int) -> WhisperModel:
+    """Load a WhisperModel once per (model_size, device, compute_type, cpu_threads)."""
+    return WhisperModel(
+        model_size, 
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        download_root=str(_MODEL_CACHE)
+    )
+
+
+def load_model(
+    device: str,
+    model_size: Optional[str] = None,
+    compute_type: Optional[str] = None,
     verbose: bool = False,
-    max_seconds: Optional[float] = None
-) -> Dict:
+    cpu_threads: Optional[int] = None
+) -> WhisperModel:
     """
-    Transcribe audio file using faster-whisper.
+    Load (or reuse) a WhisperModel for an already resolved device.
     
     Args:
-        audio_path: Path to audio file
-        language: Language code (e.g., 'en' for English, 'uk' for Ukrainian)
-        device: Device to use ('auto', 'cpu', 'cuda')
+        device: Device returned by get_device ('cpu' or 'cuda')
         model_size: Whisper model size
+        compute_type: CTranslate2 quantization type
+                      (defaults to int8_float16 on CUDA, int8 on CPU)
         verbose: Enable verbose output
+        cpu_threads: CTranslate2 threads on CPU (defaults to half the cores,
+                     leaving the rest to diarization running alongside)
         
     Returns:
-        Dictionary with transcription results including segments and text
+        Cached WhisperModel instance
     """
-    device, fallback_occurred = get_device(device)
-    
     # Use model size from env if not specified
     if model_size is None:
         model_size = os.getenv("WHISPER_MODEL_SIZE", "large-v3")
     
-    if verbose:
-        print(f"Loading {model_size} model on {device}...")
+    # INT8 weights with FP16 activations on GPU; on CPU CTranslate2 picks
+    # the fastest int8 kernels (e.g. VNNI) for the host
+    if compute_type is None:
+        compute_type = "int8_float16" if device == "cuda" else "int8"
     
-    # Initialize model with optimal settings for the device
-    compute_type = "float16" if device == "cuda" else "int8"
-    model = WhisperModel(
-        model_size, 
-        device=device,
-        compute_type=compute_type,
-        download_root=Path.home() / ".cache" / "whisper"
-    )
-    
-    # Handle max_seconds by creating temporary clip
-    audio_to_process = str(audio_path)
-    if max_seconds is not None:
-        import tempfile
-        import soundfile as sf
-        
-        if verbose:
-            print(f"Creating temporary clip: first {max_seconds} seconds...")
-        
-        # Read original audio
-        data, sample_rate = sf.read(str(audio_path))
-        max_samples = int(max_seconds * sample_rate)
-        
-        # Trim to max_seconds
-        if len(data) > max_samples:
-            data = data[:max_samples]
-        
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        sf.write(temp_file.name, data, sample_rate)
-        audio_to_process = temp_file.name
-        
-        if verbose:
-            print(f"Temporary file created: {audio_to_process}")
+    if cpu_threads is None:
+        cpu_threads = max(1, (os.cpu_count() or 1) // 2)
     
     if verbose:
-        print(f"Transcribing {audio_to_process}...")
-    
-    # Transcribe with word timestamps for better alignment with speakers
-    segments, info = model.transcribe(
-        audio_to_process,
-        language=language,
-        word_timestamps=True,
-        vad_filter=True,  # Voice activity detection
-        vad_parameters=dict(
-            min_silence_duration_ms=500,  # Minimum silence for speaker change
-            threshold=0.5
-        )
-    )
-    
-    # Convert generator to list and extract information
-    segments_list = []
-    full_text = []
+        print(f"Loading {model_size} model on {device} ({compute_type})...")
     
+    return _get_whisper(model_size, device, compute_type, cpu_threads)
+
+
+def _iter_segments(segments: Iterable) -> Iterator[Dict]:
+    """Lazily convert faster-whisper segments to dictionaries."""
     for segment in segments:
         segment_dict = {
             "start": segment.start,
@@ -147,21 +121,84 @@ def transcribe_audio(
                 for word in segment.words
             ]
         
+        yield segment_dict
+
+
+def transcribe_audio(
+    audio: np.ndarray, 
+    language: str = "en",
+    device: str = "auto",
+    model_size: str = None,
+    verbose: bool = False,
+    batch_size: Optional[int] = None,
+    compute_type: Optional[str] = None,
+    on_segment: Optional[Callable[[Dict], None]] = None,
+    cpu_threads: Optional[int] = None
+) -> Dict:
+    """
+    Transcribe decoded audio using faster-whisper.
+    
+    Args:
+        audio: Mono 16 kHz float32 samples
+        language: Language code (e.g., 'en' for English, 'uk' for Ukrainian)
+        device: Device to use ('auto', 'cpu', 'cuda')
+        model_size: Whisper model size
+        verbose: Enable verbose output
+        batch_size: Number of VAD chunks decoded per forward pass
+                    (defaults to 8 on CUDA, 4 on CPU)
+        compute_type: CTranslate2 quantization type
+                      (defaults to int8_float16 on CUDA, int8 on CPU)
+        on_segment: Optional callback invoked with each segment as soon as
+                    it is decoded (e.g. to report progress)
+        cpu_threads: CTranslate2 threads on CPU (defaults to half the cores)
+        
+    Returns:
+        Dictionary with transcription results including segments and text
+    """
+    device, fallback_occurred = get_device(device)
+    
+    model = load_model(device, model_size, compute_type, verbose, cpu_threads)
+    
+    if verbose:
+        print(f"Transcribing {len(audio) / 16000:.1f}s of audio...")
+    
+    if batch_size is None:
+        batch_size = 8 if device == "cuda" else 4
+    
+    # Batch VAD-segmented chunks into a single forward pass
+    batched_model = BatchedInferencePipeline(model=model)
+    
+    # Transcribe with word timestamps for better alignment with speakers
+    segments, info = batched_model.transcribe(
+        audio,
+        language=language,
+        batch_size=batch_size,
+        # Keep sentence-level segments; otherwise each segment is a whole
+        # VAD chunk (up to 30s) and speaker changes inside it are lost
+        without_timestamps=False,
+        word_timestamps=True,
+        vad_filter=True,  # Voice activity detection
+        vad_parameters=dict(
+            min_silence_duration_ms=500,  # Minimum silence for speaker change
+            threshold=0.5
+        )
+    )
+    
+    # Consume segments as whisper decodes them
+    segments_list = []
+    full_text = io.StringIO()
+    
+    for segment_dict in _iter_segments(segments):
+        if segments_list:
+            full_text.write(" ")
+        full_text.write(segment_dict["text"])
         segments_list.append(segment_dict)
-        full_text.append(segment.text.strip())
-    
-    # Cleanup temporary file if created
-    if max_seconds is not None and audio_to_process != str(audio_path):
-        try:
-            os.unlink(audio_to_process)
-            if verbose:
-                print(f"Cleaned up temporary file: {audio_to_process}")
-        except Exception as e:
-            if verbose:
-                print(f"Warning: Could not cleanup temporary file: {e}")
+        
+        if on_segment is not None:
+            on_segment(segment_dict)
     
     result = {
-        "text": " ".join(full_text),
+        "text": full_text.getvalue(),
         "segments": segments_list,
         "language": info.language,
         "duration": info.duration,
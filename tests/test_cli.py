@@ -0,0 +1,36 @@
+"""Tests for batch command helpers."""
+
+from pathlib import Path
+
+import click
+import pytest
+
+from gromit.cli import _transcript_paths
+
+
+def test_transcript_paths_use_stem():
+    outputs = _transcript_paths([Path("in/a.mp3"), Path("in/b.wav")], Path("out"))
+
+    assert outputs == {
+        Path("in/a.mp3"): Path("out/a_transcript.txt"),
+        Path("in/b.wav"): Path("out/b_transcript.txt"),
+    }
+
+
+def test_transcript_paths_keep_extension_for_shared_stems():
+    outputs = _transcript_paths(
+        [Path("in/a.mp3"), Path("in/A.wav"), Path("in/b.mp4")], Path("out")
+    )
+
+    assert outputs == {
+        Path("in/a.mp3"): Path("out/a_mp3_transcript.txt"),
+        Path("in/A.wav"): Path("out/A_wav_transcript.txt"),
+        Path("in/b.mp4"): Path("out/b_transcript.txt"),
+    }
+
+
+def test_transcript_paths_reject_remaining_clashes():
+    with pytest.raises(click.ClickException):
+        _transcript_paths(
+            [Path("in/a.mp3"), Path("in/a.wav"), Path("in/a_mp3.wav")], Path("out")
+        )
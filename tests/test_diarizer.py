@@ -0,0 +1,66 @@
+"""Tests for the cached diarization pipeline."""
+
+import sys
+import types
+
+import pytest
+
+from gromit import diarizer
+
+
+class _Annotation:
+    def itertracks(self, yield_label=False):
+        return iter(())
+
+
+class _FakePipeline:
+    """Stand-in for the pyannote pipeline that records its batch sizes per call."""
+
+    def __init__(self):
+        self.segmentation_batch_size = 32
+        self.embedding_batch_size = 32
+        self.calls = []
+
+    @classmethod
+    def from_pretrained(cls, *args, **kwargs):
+        return cls()
+
+    def to(self, device):
+        return self
+
+    def __call__(self, audio, **params):
+        self.calls.append((self.segmentation_batch_size, self.embedding_batch_size))
+        return _Annotation()
+
+
+class _Waveform:
+    shape = (1, 16000)
+
+    def to(self, device):
+        return self
+
+
+@pytest.fixture
+def fake_pyannote(monkeypatch):
+    package = types.ModuleType("pyannote")
+    audio = types.ModuleType("pyannote.audio")
+    audio.Pipeline = _FakePipeline
+    package.audio = audio
+    monkeypatch.setitem(sys.modules, "pyannote", package)
+    monkeypatch.setitem(sys.modules, "pyannote.audio", audio)
+    diarizer._get_pyannote.cache_clear()
+    yield
+    diarizer._get_pyannote.cache_clear()
+
+
+def test_batch_size_override_does_not_stick(fake_pyannote):
+    audio = {"waveform": _Waveform(), "sample_rate": 16000}
+
+    diarizer.diarize_audio(
+        audio, device="cpu", hf_token="token",
+        segmentation_batch_size=1, embedding_batch_size=2,
+    )
+    diarizer.diarize_audio(audio, device="cpu", hf_token="token")
+
+    pipeline = diarizer.load_pipeline(device="cpu", hf_token="token")
+    assert pipeline.calls == [(1, 2), (32, 32)]
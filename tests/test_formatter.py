@@ -0,0 +1,101 @@
+"""Tests for speaker alignment in the formatter."""
+
+import numpy as np
+import pytest
+
+from gromit.formatter import (
+    _align_segments,
+    _align_segments_loop,
+    _align_segments_numpy,
+    _disjoint_intervals,
+)
+
+
+def _baseline_speakers(transcription_segments, speaker_segments):
+    """Reference implementation: first speaker segment containing the midpoint."""
+    speakers = []
+    for trans_seg in transcription_segments:
+        trans_mid = (trans_seg["start"] + trans_seg["end"]) / 2
+        speaker = "Unknown"
+        for speaker_seg in speaker_segments:
+            if speaker_seg["start"] <= trans_mid <= speaker_seg["end"]:
+                speaker = speaker_seg["speaker"]
+                break
+        speakers.append(speaker)
+    return speakers
+
+
+def _random_case(rng):
+    """Random sorted, overlapping speaker turns and transcription segments on a 0.5s grid."""
+    starts = np.sort(rng.integers(0, 200, rng.integers(0, 30))) / 2
+    speaker_segments = [
+        {"start": start, "end": start + rng.integers(0, 40) / 2, "speaker": f"Speaker {k + 1}"}
+        for k, start in enumerate(starts.tolist())
+    ]
+    transcription_segments = []
+    for _ in range(rng.integers(0, 40)):
+        start = rng.integers(-10, 220) / 2
+        transcription_segments.append({"start": start, "end": start + rng.integers(0, 10) / 2, "text": "x"})
+    return transcription_segments, speaker_segments
+
+
+def _kernel_inputs(rng):
+    """Random kernel arguments, with speaker turns already made disjoint."""
+    transcription_segments, speaker_segments = _random_case(rng)
+    starts, ends, _ = _disjoint_intervals(
+        np.array([seg["start"] for seg in speaker_segments], dtype=np.float64),
+        np.array([seg["end"] for seg in speaker_segments], dtype=np.float64),
+    )
+    return (
+        np.array([seg["start"] for seg in transcription_segments], dtype=np.float64),
+        np.array([seg["end"] for seg in transcription_segments], dtype=np.float64),
+        starts,
+        ends,
+    )
+
+
+def test_overlapping_turns_use_first_containing_turn():
+    speaker_segments = [
+        {"start": 0.0, "end": 10.0, "speaker": "Speaker 1"},
+        {"start": 5.0, "end": 6.0, "speaker": "Speaker 2"},
+    ]
+    transcription_segments = [
+        {"start": 7.0, "end": 9.0, "text": "a"},  # midpoint 8
+        {"start": 5.0, "end": 5.8, "text": "b"},  # midpoint 5.4
+        {"start": 11.0, "end": 12.0, "text": "c"},
+    ]
+
+    aligned = _align_segments(transcription_segments, speaker_segments)
+
+    assert [seg["speaker"] for seg in aligned] == ["Speaker 1", "Speaker 1", "Unknown"]
+
+
+def test_alignment_matches_baseline_on_overlapping_turns():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        transcription_segments, speaker_segments = _random_case(rng)
+
+        aligned = _align_segments(transcription_segments, speaker_segments)
+
+        assert [seg["speaker"] for seg in aligned] == _baseline_speakers(
+            transcription_segments, speaker_segments
+        )
+
+
+def test_loop_kernel_matches_numpy_kernel():
+    rng = np.random.default_rng(1)
+    for _ in range(500):
+        args = _kernel_inputs(rng)
+
+        np.testing.assert_array_equal(_align_segments_loop(*args), _align_segments_numpy(*args))
+
+
+def test_numba_kernel_matches_numpy_kernel():
+    numba = pytest.importorskip("numba")
+    kernel = numba.njit(boundscheck=True)(_align_segments_loop)
+
+    rng = np.random.default_rng(2)
+    for _ in range(500):
+        args = _kernel_inputs(rng)
+
+        np.testing.assert_array_equal(kernel(*args), _align_segments_numpy(*args))